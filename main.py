@@ -1,6 +1,12 @@
 from fastapi import FastAPI, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from contextlib import asynccontextmanager
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 from typing import List, Optional
+from datetime import datetime
 import logging
 
 from services.flight_manager import generate_flights, handle_flight_search, handle_flight_book
@@ -11,25 +17,42 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 
 logger = logging.getLogger(__name__)
     
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await models.init_db()
+    yield
+    await models.engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
+
+# Compress larger responses such as long flight lists
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 @app.post("/generate-flight/")
-def generate_flight(flight_input: models.FlightInput, num_flights: int, db: Session = Depends(models.get_db)):
-    return generate_flights(flight_input, num_flights, db)
+async def generate_flight(flight_input: models.FlightInput, num_flights: int, db: AsyncSession = Depends(models.get_db)):
+    return await generate_flights(flight_input, num_flights, db)
 
 @app.post("/book_flight")
-def book_flight_endpoint(flight_id: int, seat_type: str, num_seats: int = 1, db: Session = Depends(models.get_db)):
+async def book_flight_endpoint(flight_id: int, seat_type: str, num_seats: int = 1, db: AsyncSession = Depends(models.get_db)):
     try:
-        result = handle_flight_book(flight_id, seat_type, num_seats, db)
+        result = await handle_flight_book(flight_id, seat_type, num_seats, db)
         return {"message": result}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/flights/", response_model=List[models.FlightModel])
-def read_all_flights(db: Session = Depends(models.get_db)):
-    flights = db.query(models.Flight).all()
+async def read_all_flights(db: AsyncSession = Depends(models.get_db)):
+    # Fail loudly on any lazy relationship load instead of silently issuing one query per flight
+    result = await db.execute(select(models.Flight).options(raiseload('*')))
+    flights = result.scalars().all()
     return flights
 
-@app.get("/search-flights/")
-def search_flights_endpoint(criteria: models.FlightSearchCriteria = Depends(), page: Optional[int] = 1, page_size: Optional[int] = 10, db: Session = Depends(models.get_db)):
-    return handle_flight_search(criteria, db, page, page_size)
+@app.get("/search-flights/", response_class=ORJSONResponse)
+async def search_flights_endpoint(criteria: models.FlightSearchCriteria = Depends(), page: Optional[int] = 1, page_size: Optional[int] = 10, cursor_departure_time: Optional[datetime] = None, cursor_flight_id: Optional[int] = None, db: AsyncSession = Depends(models.get_db)):
+    cursor = (cursor_departure_time, cursor_flight_id) if cursor_departure_time is not None and cursor_flight_id is not None else None
+    results = await handle_flight_search(criteria, db, page, page_size, cursor)
+    if not isinstance(results, dict) or "flights" not in results:
+        return results
+
+    # Hand orjson plain dicts in a ready response so FastAPI skips its jsonable_encoder pass over every flight
+    return ORJSONResponse(content={**results, "flights": [flight.model_dump() for flight in results["flights"]]})
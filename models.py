@@ -1,11 +1,12 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Date
+from sqlalchemy import Column, Integer, String, DateTime, Date, Index, event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 from pydantic import BaseModel, Field
 from datetime import date, datetime, time
 from typing import Optional
 
-DATABASE_URL = "sqlite:///./flights.db"
+DATABASE_URL = "sqlite+aiosqlite:///./flights.db"
 Base = declarative_base()
 
 class Flight(Base):
@@ -29,6 +30,11 @@ class Flight(Base):
     business_seat_cost = Column(Integer)
     first_class_cost = Column(Integer)
 
+    __table_args__ = (
+        # Matches the search filters and the (departure_time, flight_id) keyset used for pagination
+        Index('ix_flight_search', 'origin', 'destination', 'departure_time', 'flight_id'),
+    )
+
 # Pydantic Models for inputs & Body Validation
 class FlightModel(BaseModel):
     flight_id: int
@@ -69,19 +75,37 @@ class FlightSearchCriteria(BaseModel):
     seat_type: Optional[str] = None  # 'economy', 'business', 'first_class'
     min_cost: Optional[int] = None
     max_cost: Optional[int] = None
+    fields: Optional[str] = None  # comma-separated FlightModel fields to return, e.g. 'flight_number,departure_time'
     
 
+# Create the async engine; connections are kept in a pool and reused across requests
+# (aiosqlite would otherwise default to opening a new connection every time)
+engine = create_async_engine(DATABASE_URL, poolclass=AsyncAdaptedQueuePool, pool_size=20, max_overflow=10, connect_args={"check_same_thread": False})
+
+# Tune every new SQLite connection: WAL journaling with relaxed syncing avoids an fsync per commit,
+# and temp tables and a 64MB page cache are kept in memory
+@event.listens_for(engine.sync_engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.close()
+
 # Create the database
-engine = create_engine(DATABASE_URL)
-Base.metadata.create_all(bind=engine)
+async def init_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+        # create_all skips tables that already exist, so add any indexes missing from an existing database
+        for index in Flight.__table__.indexes:
+            await conn.run_sync(index.create, checkfirst=True)
 
-# Create a Session local class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Create a Session local class; objects stay loaded after commit so they can be returned without lazy IO
+SessionLocal = async_sessionmaker(engine, autocommit=False, autoflush=False, expire_on_commit=False)
 
 # Dependency
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
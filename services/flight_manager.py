@@ -1,85 +1,194 @@
-import random
+import string
+import numpy as np
 import requests
-from datetime import datetime, timedelta, time, date
+from datetime import datetime, time, date
 from dateutil.parser import parse
 from typing import Optional
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException
-from sqlalchemy import and_, func
-from sqlalchemy.orm import Session
+from sqlalchemy import DateTime, String, Time, and_, bindparam, func, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 from models import Flight, FlightModel, FlightSearchCriteria, get_db
 import logging
 
 # Create a logger for this module
 logger = logging.getLogger(__name__)
 
-def generate_flight_number():
-    # Example: AA342
-    return f"{random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')}{random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')}{random.randint(100, 999)}"
+# Open seat and seat cost columns for each bookable seat type
+SEAT_COLUMNS = {
+    "economy": (Flight.open_seats_economy, Flight.economy_seat_cost),
+    "business": (Flight.open_seats_business, Flight.business_seat_cost),
+    "first_class": (Flight.open_seats_first_class, Flight.first_class_cost),
+}
 
-def choose_airline():
-    # Example airlines
-    airlines = ['Phantom', 'DreamSky Airlines', 'VirtualJet', 'Enchanted Air', 'AeroFiction']
-    return random.choice(airlines)
-
-def calculate_times(origin, destination, flight_date):
-    # Randomly generate departure time between 0 and 23 hours
-    departure_hour = random.randint(0, 23)
-    departure_minute = random.randint(0, 59)
-    # Use flight_date instead of datetime.now()
-    departure_time = datetime.combine(flight_date, datetime.min.time()).replace(hour=departure_hour, minute=departure_minute)
-
-    # Random duration for the flight between 30 mins to 10 hours
-    duration = timedelta(minutes=random.randint(30, 600))
-    arrival_time = departure_time + duration
-
-    # Extracting the arrival date
-    arrival_date = arrival_time.date()
-
-    return departure_time, arrival_time, arrival_date
+def build_search_filters(with_cursor, with_flight_number):
+    """
+    Builds the flight search filters, with the optional filters written as bound parameters that disable
+    the filter when bound to None. Each search then runs one of a few fixed statements with different
+    parameters, so SQLAlchemy compiles them once and reuses the compiled forms from its statement cache.
 
-def generate_flights(flight_input, num_flights, db: Session):
-    flights = []
-    
-    for _ in range(num_flights):
-        flight_number = generate_flight_number()
-        airline = choose_airline()
-        departure_time, arrival_time, arrival_date= calculate_times(flight_input.origin, flight_input.destination, flight_input.departure_date)
-        
-        open_seats_economy = random.randint(0, 200)  
-        open_seats_business = random.randint(0, 50)
-        open_seats_first_class = random.randint(0, 20)
-
-        economy_seat_cost = random.randint(50, 500)  
-        business_seat_cost = random.randint(500, 1500)
-        first_class_cost = random.randint(1500, 3000)
-
-        new_flight = Flight(
-            flight_number =             flight_number,
-            airline =                   airline,
-            origin =                    flight_input.origin,
-            destination =               flight_input.destination,
-            
-            departure_date =            flight_input.departure_date,
-            arrival_date =              arrival_date,
-            departure_time =            departure_time,
-            arrival_time =              arrival_time,
-            
-            open_seats_economy =        open_seats_economy,
-            open_seats_business =       open_seats_business,
-            open_seats_first_class =    open_seats_first_class,
-            economy_seat_cost =         economy_seat_cost,
-            business_seat_cost =        business_seat_cost,
-            first_class_cost =          first_class_cost
+    The keyset cursor and the flight number are left out of that scheme and get their own statement
+    variants instead: wrapped in 'IS NULL OR', SQLite could no longer seek an index on them.
+    """
+    departure_until = bindparam("departure_until", type_=DateTime)
+    airline = bindparam("airline", type_=String)
+    time_from = bindparam("time_from", type_=Time)
+    seat_type = bindparam("seat_type", type_=String)
+    min_cost = bindparam("min_cost")
+    max_cost = bindparam("max_cost")
+
+    filters = [
+        Flight.origin == bindparam("origin"),
+        Flight.destination == bindparam("destination"),
+        Flight.departure_time >= bindparam("departure_from"),
+        or_(departure_until.is_(None), Flight.departure_time <= departure_until),
+        or_(airline.is_(None), Flight.airline == airline),
+        or_(time_from.is_(None), Flight.departure_time.between(time_from, bindparam("time_until", type_=Time))),
+        or_(
+            seat_type.is_(None),
+            *[and_(seat_type == name, cost.between(min_cost, max_cost)) for name, (_, cost) in SEAT_COLUMNS.items()]
         )
-
-        db.add(new_flight)
-        db.commit()
-        db.refresh(new_flight)
-        logging.info(f"Successfully added flight: {new_flight.flight_number}")
-        
-    return flights
-
-def handle_flight_search(criteria, db: Session, page: Optional[int] = 1, page_size: Optional[int] = 10):
+    ]
+    if with_flight_number:
+        filters.append(Flight.flight_number == bindparam("flight_number", type_=String))
+    if with_cursor:
+        filters.append(
+            tuple_(Flight.departure_time, Flight.flight_id) > tuple_(bindparam("cursor_departure_time", type_=DateTime), bindparam("cursor_flight_id"))
+        )
+    return filters
+
+# Search statements keyed on (with_cursor, with_flight_number).
+# They select the flight columns directly rather than loading full ORM instances.
+SEARCH_QUERIES = {
+    (with_cursor, with_flight_number): (
+        select(*Flight.__table__.columns)
+        .where(*build_search_filters(with_cursor, with_flight_number))
+        # Order by the (departure_time, flight_id) keyset so pages are stable and can be seeked into
+        .order_by(Flight.departure_time, Flight.flight_id)
+        .offset(bindparam("offset"))
+        .limit(bindparam("limit"))
+    )
+    for with_cursor in (False, True)
+    for with_flight_number in (False, True)
+}
+
+# Count statements keyed on with_flight_number; they count only the matching ids, without reading or sorting full rows
+SEARCH_COUNT_QUERIES = {
+    with_flight_number: select(func.count(Flight.flight_id)).where(*build_search_filters(False, with_flight_number))
+    for with_flight_number in (False, True)
+}
+
+# Recent search results, keyed on the route first so they can be invalidated per route
+search_cache = TTLCache(maxsize=1024, ttl=30)
+
+# Number of times each route's cached results have been invalidated
+search_generations = {}
+
+# Random generator used to draw flight values for a whole batch at once
+rng = np.random.default_rng()
+
+# Example airlines
+AIRLINES = ('Phantom', 'DreamSky Airlines', 'VirtualJet', 'Enchanted Air', 'AeroFiction')
+
+# Letters used for flight number prefixes
+LETTERS = string.ascii_uppercase
+LETTER_POOL = np.array(list(LETTERS))
+
+def generate_flight_numbers(num_flights):
+    # Example: AA342, drawn for the whole batch at once
+    letters = rng.choice(LETTER_POOL, size=(num_flights, 2)).tolist()
+    numbers = rng.integers(100, 1000, num_flights).tolist()
+    return [f"{first}{second}{number}" for (first, second), number in zip(letters, numbers)]
+
+def calculate_times(origin, destination, flight_date, num_flights):
+    # Randomly generate departure times between 0 and 23 hours on flight_date, one per flight
+    departure_hours = rng.integers(0, 24, num_flights)
+    departure_minutes = rng.integers(0, 60, num_flights)
+    departure_times = np.datetime64(flight_date, 'D') + departure_hours * np.timedelta64(1, 'h') + departure_minutes * np.timedelta64(1, 'm')
+
+    # Random duration for the flights between 30 mins to 10 hours
+    durations = rng.integers(30, 601, num_flights)
+    arrival_times = departure_times + durations * np.timedelta64(1, 'm')
+
+    # Extracting the arrival dates
+    arrival_dates = arrival_times.astype('datetime64[D]')
+
+    return departure_times.tolist(), arrival_times.tolist(), arrival_dates.tolist()
+
+async def generate_flights(flight_input, num_flights, db: AsyncSession):
+    # Nothing to generate; executing the INSERT with no rows would add a single row of defaults
+    if num_flights <= 0:
+        return []
+
+    # Draw every random value for the batch up front, one vectorized call per column
+    flight_numbers = generate_flight_numbers(num_flights)
+    airlines = rng.choice(AIRLINES, num_flights).tolist()
+    departure_times, arrival_times, arrival_dates = calculate_times(flight_input.origin, flight_input.destination, flight_input.departure_date, num_flights)
+
+    open_seats_economy = rng.integers(0, 201, num_flights).tolist()
+    open_seats_business = rng.integers(0, 51, num_flights).tolist()
+    open_seats_first_class = rng.integers(0, 21, num_flights).tolist()
+
+    economy_seat_cost = rng.integers(50, 501, num_flights).tolist()
+    business_seat_cost = rng.integers(500, 1501, num_flights).tolist()
+    first_class_cost = rng.integers(1500, 3001, num_flights).tolist()
+
+    # Values shared by every flight in the batch are looked up once
+    origin, destination, departure_date = flight_input.origin, flight_input.destination, flight_input.departure_date
+
+    # Each row takes one value from every generated column
+    rows = [
+        {
+            "flight_number":            flight_number,
+            "airline":                  airline,
+            "origin":                   origin,
+            "destination":              destination,
+
+            "departure_date":           departure_date,
+            "arrival_date":             arrival_date,
+            "departure_time":           departure_time,
+            "arrival_time":             arrival_time,
+
+            "open_seats_economy":       economy_seats,
+            "open_seats_business":      business_seats,
+            "open_seats_first_class":   first_class_seats,
+            "economy_seat_cost":        economy_cost,
+            "business_seat_cost":       business_cost,
+            "first_class_cost":         first_cost
+        }
+        for (
+            flight_number, airline, arrival_date, departure_time, arrival_time,
+            economy_seats, business_seats, first_class_seats, economy_cost, business_cost, first_cost
+        ) in zip(
+            flight_numbers, airlines, arrival_dates, departure_times, arrival_times,
+            open_seats_economy, open_seats_business, open_seats_first_class,
+            economy_seat_cost, business_seat_cost, first_class_cost
+        )
+    ]
+
+    # Insert the whole batch in one Core statement on the session's connection, bypassing the ORM
+    # unit of work and getting the new ids back in the same round trip.
+    # The batch lands in a single transaction: either every flight is committed or none is.
+    flights_table = Flight.__table__
+    try:
+        conn = await db.connection()
+        result = await conn.execute(flights_table.insert().returning(flights_table.c.flight_id, sort_by_parameter_order=True), rows)
+        for row, flight_id in zip(rows, result.scalars()):
+            row["flight_id"] = flight_id
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        logger.exception("Failed to add batch of %d flights", num_flights)
+        raise
+
+    invalidate_search_cache(flight_input.origin, flight_input.destination)
+
+    logger.info("Successfully added %d flights from %s to %s", len(rows), flight_input.origin, flight_input.destination)
+
+    return rows
+
+async def handle_flight_search(criteria, db: AsyncSession, page: Optional[int] = 1, page_size: Optional[int] = 10, cursor: Optional[tuple] = None):
     """
     Handles the search for flights based on various criteria. The function applies filters for
     origin, destination, departure date, and optionally arrival date, flight number, airline, 
@@ -89,108 +198,172 @@ def handle_flight_search(criteria, db: Session, page: Optional[int] = 1, page_si
     - criteria: An object containing the search criteria, including origin, destination, 
       departure date, optional arrival date, flight number, airline, departure time, arrival time, 
       seat type, minimum and maximum cost.
-    - db (Session): The database session used to execute the query.
-    - page (Optional[int]): The page number for pagination, default is 1.
+    - db (AsyncSession): The database session used to execute the query.
+    - page (Optional[int]): The page number for pagination, default is 1. Only used when no cursor is given.
     - page_size (Optional[int]): The number of records per page for pagination, default is 10.
+    - cursor (Optional[tuple]): The (departure_time, flight_id) of the last flight of the previous page. 
+      When given, the search seeks directly past it instead of skipping rows with an offset.
 
-    The function first builds a query with basic filters such as origin, destination, and departure date. 
-    Additional filters for arrival date, flight number, airline, time range, and seat type with cost 
-    constraints are applied if provided in the criteria. The function handles parsing of date and time 
+    The function runs one of a few precompiled queries that always filter on origin, destination, and departure date. 
+    Additional filters for arrival date, airline, time range, and seat type with cost constraints are switched on 
+    by binding their parameters if provided in the criteria; a flight number or cursor picks the query variant 
+    that filters on them. The function handles parsing of date and time 
     strings and validates them. In case of invalid arrival date format, it logs an error and returns 
-    an HTTP exception. 
+    an HTTP exception. If the criteria list the fields to return, only those columns are selected and 
+    returned for each flight.
 
-    The function also handles pagination, calculating the total number of matching records and total pages.
-    It checks if the requested page exceeds the total number of available pages and handles this scenario 
-    by returning an appropriate message. Finally, it fetches the flights based on the applied filters and 
-    pagination, converts the SQLAlchemy models to Pydantic models, and returns the search results.
+    The function also handles pagination using keyset (seek) pagination ordered by departure time and flight id. 
+    One row more than the page size is fetched to tell whether a next page exists. The total number of pages 
+    is only counted for the first page of a page-number search and for empty pages; it is None on other pages. 
+    If the requested page exceeds the total number of available pages, it returns an appropriate message. 
+    The cursor to pass in to fetch the next page is returned with the results. Results are cached for a short 
+    time per criteria and page, and dropped whenever flights on the route are generated or booked. Finally, 
+    it builds Pydantic models directly from the selected rows and returns the search results.
 
     Returns:
-    A dictionary containing the number of query results, a list of flight models, the current page, and 
-    total number of pages.
+    A dictionary containing the number of query results, a list of flight models, the current page, the total 
+    number of pages, whether there is a next page, and the cursor for the next page.
     """
-    query = db.query(Flight)
-    
-    departure_datetime = datetime.combine(criteria.departure_date, time.min)
+    cache_key = (criteria.origin, criteria.destination, tuple(criteria.model_dump().items()), page, page_size, cursor)
+    cached = search_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
-    # Start building the query with basic filters
-    query = query.filter(
-        Flight.origin == criteria.origin,
-        Flight.destination == criteria.destination
-    )
+    # Remember how often the route has been invalidated, to tell whether these results go stale before they are cached
+    generation = search_generations.get(cache_key[:2], 0)
+
+    # Pick the statement variant for the cursor and flight number filters, if any
+    query = SEARCH_QUERIES[(cursor is not None, bool(criteria.flight_number))]
+
+    # Only select the requested fields, plus the keyset columns needed to build the next page cursor
+    fields = list(FlightModel.model_fields)
+    if criteria.fields:
+        fields = [field.strip() for field in criteria.fields.split(",") if field.strip()]
+        unknown_fields = [field for field in fields if field not in FlightModel.model_fields]
+        if unknown_fields:
+            raise HTTPException(400, f"Unknown flight fields requested: {', '.join(unknown_fields)}")
 
-    # Additional handling for departure date
-    query = query.filter(Flight.departure_time >= departure_datetime)
+        selected = dict.fromkeys([*fields, "departure_time", "flight_id"])
+        query = query.with_only_columns(*[Flight.__table__.c[field] for field in selected])
+
+    departure_datetime = datetime.combine(criteria.departure_date, time.min)
 
     # Additional handling for arrival date if it's provided
+    arrival_datetime = None
     if criteria.arrival_date:
         try:
             arrival_date = parse(criteria.arrival_date).date()
             arrival_datetime = datetime.combine(arrival_date, time.max)
-            query = query.filter(Flight.departure_time <= arrival_datetime)
         except ValueError:
-            logging.error("Arrival date present but invalid as data type")
+            logger.error("Arrival date present but invalid as data type")
             return HTTPException(500, "Arrival date present but invalid as data type")
 
-    # Flight Extra Filters
-    if criteria.flight_number:
-        query = query.filter(Flight.flight_number == criteria.flight_number)
-    if criteria.airline:
-        query = query.filter(Flight.airline == criteria.airline)
+    # Fill in the filters of the precompiled search statement; a None value switches that filter off
+    params = {
+        "origin": criteria.origin,
+        "destination": criteria.destination,
+        "departure_from": departure_datetime,
+        "departure_until": arrival_datetime,
+        "flight_number": criteria.flight_number or None,
+        "airline": criteria.airline or None,
+        "time_from": None,
+        "time_until": None,
+        "seat_type": criteria.seat_type if criteria.seat_type in SEAT_COLUMNS else None,
+        "min_cost": int(criteria.min_cost) if criteria.min_cost is not None else 0,
+        "max_cost": int(criteria.max_cost) if criteria.max_cost is not None else float('inf'),
+        "cursor_departure_time": None,
+        "cursor_flight_id": None,
+        "offset": 0,
+        # Fetch one extra row to find out whether there is a next page without counting every match
+        "limit": page_size + 1
+    }
     if criteria.departure_time and criteria.arrival_time:
-        query = query.filter(Flight.departure_time.between(criteria.departure_time, criteria.arrival_time))
-    if criteria.seat_type:
-        min_cost = int(criteria.min_cost) if criteria.min_cost is not None else 0
-        max_cost = int(criteria.max_cost) if criteria.max_cost is not None else float('inf')
-
-        if criteria.seat_type == 'economy':
-            query = query.filter(Flight.economy_seat_cost.between(min_cost, max_cost))
-        elif criteria.seat_type == 'business':
-            query = query.filter(Flight.business_seat_cost.between(min_cost, max_cost))
-        elif criteria.seat_type == 'first_class':
-            query = query.filter(Flight.first_class_cost.between(min_cost, max_cost))
+        params["time_from"], params["time_until"] = criteria.departure_time, criteria.arrival_time
+
+    # Apply pagination: seek past the cursor when one is given, otherwise fall back to the page number
+    if cursor is not None:
+        params["cursor_departure_time"], params["cursor_flight_id"] = cursor
+        # Start the departure time range at the cursor too, so the index range scan begins there
+        # instead of at the departure date and filtering its way up to the cursor
+        params["departure_from"] = max(departure_datetime, cursor[0])
+    else:
+        params["offset"] = (page - 1) * page_size
 
-        # Calculate the total count of matching records
+    flights = (await db.execute(query, params)).mappings().all()
+    has_next = len(flights) > page_size
+    flights = flights[:page_size]
 
-        # Calculate the total count of matching records
-    total_count = query.count()
+    # Count the matching records only where the total is needed: on the first page of a page-number
+    # search, and when the requested page comes back empty to tell an empty search from a page past the end.
+    # Cursor pages are continuations and rely on has_next instead.
+    total_pages = None
+    if cursor is None and (page == 1 or not flights):
+        total_count = len(flights) if page == 1 and not has_next else (await db.execute(SEARCH_COUNT_QUERIES[bool(criteria.flight_number)], params)).scalar_one()
+        total_pages = (total_count + page_size - 1) // page_size
 
-    # If no flights are found, return immediately
-    if total_count == 0:
-        return {
-            "message": "There were no flights found for the search criteria.",
+    # Check if the requested page exceeds the total number of pages
+    if not flights and total_pages:
+        results = {
+            "message": "The requested page exceeds the total number of available pages.",
             "flights": [],
             "page": page,
-            "total_pages": 0
+            "total_pages": total_pages,
+            "has_next": False,
+            "next_cursor": None
         }
+        cache_search_results(cache_key, generation, results)
+        return results
 
-    # Calculate total pages
-    total_pages = (total_count + page_size - 1) // page_size
-
-    # Check if the requested page exceeds the total number of pages
-    if page > total_pages:
-        return {
-            "message": "The requested page exceeds the total number of available pages.",
+    # If no flights are found, return immediately
+    if not flights:
+        results = {
+            "message": "There were no flights found for the search criteria.",
             "flights": [],
             "page": page,
-            "total_pages": total_pages
+            "total_pages": 0,
+            "has_next": False,
+            "next_cursor": None
         }
+        cache_search_results(cache_key, generation, results)
+        return results
 
-    # Apply pagination
-    offset = (page - 1) * page_size
-    flights = query.offset(offset).limit(page_size).all()
+    # Build Pydantic models straight from the row mappings with only the requested fields;
+    # the values come from the database so validation is skipped
+    flight_models = [FlightModel.model_construct(**{field: flight[field] for field in fields}) for flight in flights]
 
-    # Convert SQLAlchemy models to Pydantic models
-    flight_models = [FlightModel.from_orm(flight) for flight in flights]
+    # The last row of the page is where the next page starts
+    next_cursor = {"departure_time": flights[-1]["departure_time"], "flight_id": flights[-1]["flight_id"]} if has_next else None
 
     # Return the query results
-    return {
+    results = {
         "query_results": len(flight_models),
         "flights": flight_models,
         "page": page,
-        "total_pages": total_pages
+        "total_pages": total_pages,
+        "has_next": has_next,
+        "next_cursor": next_cursor
     }
+    cache_search_results(cache_key, generation, results)
+    return results
+
+def cache_search_results(cache_key, generation, results):
+    """
+    Caches search results, unless their route was invalidated while they were being read from the database:
+    they may then predate the change that invalidated it.
+    """
+    if search_generations.get(cache_key[:2], 0) == generation:
+        search_cache[cache_key] = results
+
+def invalidate_search_cache(origin, destination):
+    """
+    Drops the cached search results for a route, so searches see flights and seat counts that just changed.
+    """
+    search_generations[(origin, destination)] = search_generations.get((origin, destination), 0) + 1
+    for key in list(search_cache):
+        if key[:2] == (origin, destination):
+            search_cache.pop(key, None)
 
-def handle_flight_book(flight_id: int, seat_type: str, num_seats: int = 1, db: Session = Depends(get_db)):
+async def handle_flight_book(flight_id: int, seat_type: str, num_seats: int = 1, db: AsyncSession = Depends(get_db)):
     """
     Books a specified number of seats on a flight.
 
@@ -203,46 +376,52 @@ def handle_flight_book(flight_id: int, seat_type: str, num_seats: int = 1, db: S
     - flight_id (int): The unique identifier of the flight to book.
     - seat_type (str): The class of the seat to book (economy, business, or first_class).
     - num_seats (int, optional): The number of seats to book (default is 1).
-    - db (Session, default Depends(get_db)): SQLAlchemy database session for executing queries.
+    - db (AsyncSession, default Depends(get_db)): SQLAlchemy database session for executing queries.
 
     Returns:
     - On successful booking: A dictionary containing a success message and flight information.
     - On failure (flight not found or not enough seats): A failure message as a string.
 
-    The function checks seat availability before booking. If the requested number of seats is 
+    The seats are taken with a single conditional UPDATE that only succeeds if enough seats are still 
+    available, so concurrent bookings cannot oversell a flight. If the requested number of seats is 
     not available in the specified class, it returns an error message. If the flight is not found, 
     it returns a 'Flight not found.' message.
     """
-    # Retrieve the flight from the database
-    flight = db.query(Flight).filter(Flight.flight_id == flight_id).first()
+    seat_columns = SEAT_COLUMNS.get(seat_type)
+
+    if seat_columns:
+        open_seats, seat_cost = seat_columns
+
+        # Take the seats in a single conditional UPDATE so the availability check and the booking are atomic,
+        # returning the updated flight in the same round trip
+        result = await db.execute(
+            update(Flight)
+            .where(Flight.flight_id == flight_id, open_seats >= num_seats)
+            .values({open_seats: open_seats - num_seats})
+            .returning(Flight)
+            .options(raiseload('*'))
+        )
+        flight = result.scalars().first()
 
-    if not flight:
-        return "Flight not found."
+        if flight:
+            # Commit the booking to the database
+            await db.commit()
+            invalidate_search_cache(flight.origin, flight.destination)
 
-    # Initialize the cost variable
-    total_cost = 0
-
-    # Check seat availability based on seat type and number of requested seats
-    if seat_type == "economy" and flight.open_seats_economy >= num_seats:
-        flight.open_seats_economy -= num_seats
-        total_cost = flight.economy_seat_cost * num_seats
-    elif seat_type == "business" and flight.open_seats_business >= num_seats:
-        flight.open_seats_business -= num_seats
-        total_cost = flight.business_seat_cost * num_seats
-    elif seat_type == "first_class" and flight.open_seats_first_class >= num_seats:
-        flight.open_seats_first_class -= num_seats
-        total_cost = flight.first_class_cost * num_seats
-    else:
-        # If not enough seats are available, return a failure message
-        return f"Not enough {seat_type} seats available."
+            total_cost = getattr(flight, seat_cost.key) * num_seats
+            success_message = f"Successfully booked {num_seats} {seat_type} seat(s) on {flight.airline} flight on {flight.departure_date} from {flight.origin} to {flight.destination}. Total cost: ${total_cost}."
 
-    # Commit the booking to the database
-    db.commit()
-    
-    success_message = f"Successfully booked {num_seats} {seat_type} seat(s) on {flight.airline} flight on {flight.departure_date} from {flight.origin} to {flight.destination}. Total cost: ${total_cost}."
+            # Return a success message
+            return {"message": success_message, "flight_info": flight}
+
+    # Nothing was booked, check whether the flight exists to return the right failure message
+    result = await db.execute(select(Flight.flight_id).where(Flight.flight_id == flight_id))
+
+    if result.first() is None:
+        return "Flight not found."
 
-    # Return a success message
-    return {"message": success_message, "flight_info": flight}
+    # If not enough seats are available, return a failure message
+    return f"Not enough {seat_type} seats available."
 
 def search_flights(**params):
     """
@@ -277,6 +456,8 @@ def search_flights(**params):
         url += f"&min_cost={criteria.min_cost}"
     if criteria.max_cost is not None:
         url += f"&max_cost={criteria.max_cost}"
+    if criteria.fields:
+        url += f"&fields={criteria.fields}"
 
     url += "&page=1&page_size=10"
 